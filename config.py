@@ -1,4 +1,5 @@
-import hashlib
+import struct
+from hashlib import sha256 as _sha256  # Evita buscar el atributo en cada hash
 
 # ---------------- PARÁMETROS ----------------
     # ALGORITMO HASH: SHA-256
@@ -11,29 +12,88 @@ PSW_LEN = 5  # 5 caracteres
 HASH_LEN = 40  # 40 bits (5 bytes)
 TRUNC_LEN = 8
 ALPHABET_SIZE = len(ALPHABET)
+ALPHABET_BYTES = ALPHABET.encode()  # Alfabeto como bytes (códigos ASCII)
 SPACE_SIZE = ALPHABET_SIZE ** PSW_LEN  # 26^5 = 11,881,376
+# La reducción solo lee los PSW_LEN trozos de 5 bits más bajos del hash
+REDUCTION_MASK = (1 << (PSW_LEN * 5)) - 1  # 25 bits
 
 # Parámetros de la tabla
 t = 500  # Longitud de cadena
 n = 22000  # Número de entradas
 
+# Formato binario de la tabla (.bin): cabecera (entradas, t, PSW_LEN) seguida
+# de registros ordenados de hash final (5 bytes) + password inicial (ASCII)
+BIN_HEADER = struct.Struct('<III')
+BIN_RECORD_LEN = HASH_LEN // 8 + PSW_LEN  # 10 bytes por entrada
+
 # ---------------- FUNCIONES ----------------
 
 # CREAR HASH --------------------------
 
-def hash_function(password: str) -> bytes:
+def hash_function(password: str | bytes) -> bytes:
     """  
-    Args: password: String a hashear
+    Args: password: String a hashear (o sus bytes ASCII, que se hashean sin codificar)
     
     Returns: Hash truncado de 5 bytes (40 bits)
     """
-    full_hash = hashlib.sha256(password.encode()).digest()
+    if isinstance(password, str):
+        password = password.encode()
+    full_hash = _sha256(password).digest()
     # Truncar a 40 bits (5 bytes)
     return full_hash[:5]
 
 
 # FUNCION DE REDUCCIÓN -------------------
 
+def _build_reduction_table(num_chunks: int) -> tuple[bytes, ...]:
+    """
+    Precalcula el fragmento de password para cada valor posible de
+    num_chunks trozos de 5 bits (el trozo más bajo da el primer carácter).
+    
+    Args:
+        num_chunks: Número de trozos de 5 bits que resuelve la tabla
+    
+    Returns:
+        Tupla indexada por el valor de los trozos con los bytes ASCII
+    """
+    return tuple(
+        bytes(ALPHABET_BYTES[((value >> (i * 5)) & 0x1F) % ALPHABET_SIZE]
+              for i in range(num_chunks))
+        for value in range(1 << (num_chunks * 5))
+    )
+
+
+# Dos tablas en vez de una con 2^25 entradas: 3 trozos bajos (32768 entradas)
+# y los 2 altos (1024 entradas), de modo que el password son dos consultas
+_LOW_CHUNKS = (PSW_LEN + 1) // 2
+_LOW_BITS = _LOW_CHUNKS * 5
+_LOW_MASK = (1 << _LOW_BITS) - 1
+_REDUCTION_LOW = _build_reduction_table(_LOW_CHUNKS)
+_REDUCTION_HIGH = _build_reduction_table(PSW_LEN - _LOW_CHUNKS)
+
+def reduce_to_bytes(hash_bytes: bytes, iteration: int = 0) -> bytes:
+    """
+    Función de recodificación determinista que mapea un hash a un password.
+    Divide el hash de 40 bits en trozos de 5 bits y resuelve los caracteres
+    con las tablas precalculadas, devolviendo bytes listos para hash_function.
+    
+    Args:
+        hash_bytes: Hash de 5 bytes (40 bits)
+        iteration: Número de iteración para variar la función de reducción
+    
+    Returns:
+        Password de PSW_LEN caracteres del alfabeto, como bytes ASCII
+    """
+    # Convertir bytes a entero y añadir la iteración para hacer la función
+    # dependiente de la posición. Sumar y quedarse con los 25 bits bajos da lo
+    # mismo que reducir módulo 2^40 y leer luego esos bits, sin la división
+    hash_int = (int.from_bytes(hash_bytes, byteorder='big') + iteration) & REDUCTION_MASK
+    
+    # Solo se usan los PSW_LEN primeros trozos de 5 bits (de los TRUNC_LEN posibles),
+    # cada uno mapeado al alfabeto con módulo: ya viene resuelto en las tablas
+    return _REDUCTION_LOW[hash_int & _LOW_MASK] + _REDUCTION_HIGH[hash_int >> _LOW_BITS]
+
+
 def reduction_function(hash_bytes: bytes, iteration: int = 0) -> str:
     """
     Función de recodificación determinista que mapea un hash a un password.
@@ -46,21 +106,31 @@ def reduction_function(hash_bytes: bytes, iteration: int = 0) -> str:
     Returns:
         Password de PSW_LEN caracteres del alfabeto
     """
-    # Convertir bytes a entero
-    hash_int = int.from_bytes(hash_bytes, byteorder='big')
-    
-    # Añadir la iteración para hacer la función dependiente de la posición
-    hash_int = (hash_int + iteration) % (2**40)
-    
-    password = []
+    return reduce_to_bytes(hash_bytes, iteration).decode()
+
+
+# RECORRER CADENA ------------------------
+
+def walk_chain(hash_bytes: bytes, start: int, end: int) -> bytes:
+    """
+    Avanza una cadena desde un hash aplicando h(r(·)) con las iteraciones
+    start, start+1, ..., end-1. Cada paso fusiona la reducción y el hash
+    (hash -> entero -> tablas -> SHA-256 -> 5 bytes) sin llamadas intermedias,
+    con todas las constantes en variables locales.
     
-    # Dividir en 8 trozos de 5 bits y mapear a caracteres
-    for i in range(TRUNC_LEN):
-        # Extraer 5 bits
-        chunk = (hash_int >> (i * 5)) & 0x1F  # 0x1F = 31 = 0b11111
-        # Mapear al alfabeto (módulo para asegurar que está en rango)
-        char_idx = chunk % ALPHABET_SIZE
-        password.append(ALPHABET[char_idx])
+    Args:
+        hash_bytes: Hash de 5 bytes del que se parte
+        start: Primera iteración de la reducción a aplicar
+        end: Iteración final (excluida)
     
-    # Tomar solo PSW_LEN caracteres
-    return ''.join(password[:PSW_LEN])
\ No newline at end of file
+    Returns:
+        Hash de 5 bytes al final del recorrido
+    """
+    sha256, from_bytes = _sha256, int.from_bytes
+    low, high = _REDUCTION_LOW, _REDUCTION_HIGH
+    mask, low_mask, low_bits = REDUCTION_MASK, _LOW_MASK, _LOW_BITS
+    for j in range(start, end):
+        # Misma operación que hash_function(reduce_to_bytes(hash_bytes, j))
+        hash_int = (from_bytes(hash_bytes, 'big') + j) & mask
+        hash_bytes = sha256(low[hash_int & low_mask] + high[hash_int >> low_bits]).digest()[:5]
+    return hash_bytes
@@ -6,15 +6,17 @@ import random
 import csv
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 
 # ---------------- PARÁMETROS ----------------
 
 from config import (
     hash_function,
-    reduction_function,
+    walk_chain,
     ALPHABET, PSW_LEN, HASH_LEN, TRUNC_LEN,
-    ALPHABET_SIZE, SPACE_SIZE, t, n
+    ALPHABET_SIZE, SPACE_SIZE, BIN_HEADER, t, n
 )
 
 # -------------- GENERAR PASSWORD RANDOM -------------------
@@ -26,7 +28,22 @@ def generate_random_password() -> str:
     Returns:
         Password aleatorio de PSW_LEN caracteres
     """
-    return ''.join(random.choices(ALPHABET, k=PSW_LEN))
+    return generate_random_passwords(1)[0]
+
+
+def generate_random_passwords(count: int) -> list[str]:
+    """
+    Genera varios passwords aleatorios sacando todos los caracteres con una
+    sola llamada a random.choices.
+    
+    Args:
+        count: Número de passwords a generar
+    
+    Returns:
+        Lista de count passwords de PSW_LEN caracteres
+    """
+    chars = ''.join(random.choices(ALPHABET, k=count * PSW_LEN))
+    return [chars[k:k + PSW_LEN] for k in range(0, len(chars), PSW_LEN)]
 
 
 # ----------- CADENA INICIAL ------------------------
@@ -42,38 +59,53 @@ def build_chain(initial_password: str, chain_length: int) -> tuple[str, bytes]:
     Returns:
         Tupla (password_inicial, hash_final)
     """
-    P = initial_password
+    # Iterar t-1 veces aplicando h y r; el último h da el hash final
+    final_hash = walk_chain(hash_function(initial_password), 0, chain_length - 1)
     
-    # Iterar t-1 veces aplicando h y r
-    for j in range(chain_length - 1):
-        h_P = hash_function(P)
-        P = reduction_function(h_P, iteration=j)
+    return (initial_password, final_hash)
+
+
+def build_chains(initial_passwords: list[str], chain_length: int) -> list[tuple[str, bytes]]:
+    """
+    Construye un lote de cadenas. Es la unidad de trabajo que se reparte
+    entre procesos al construir la tabla.
     
-    # Calcular el hash final
-    final_hash = hash_function(P)
+    Args:
+        initial_passwords: Passwords iniciales de las cadenas
+        chain_length: Longitud de la cadena (t)
     
-    return (initial_password, final_hash)
+    Returns:
+        Lista de tuplas (password_inicial, hash_final)
+    """
+    return [build_chain(Pi, chain_length) for Pi in initial_passwords]
 
 
 # ----------------- CREAR TABLA ------------------------
 
-def build_rainbow_table(chain_length: int, num_entries: int, verbose: bool = True) -> dict[bytes, str]:
+def build_rainbow_table(chain_length: int, num_entries: int, verbose: bool = True,
+                        workers: int | None = None) -> tuple[dict[bytes, str], float]:
     """
     Construye una tabla arcoíris completa.
     
+    Las cadenas son independientes: se construyen por lotes repartidos entre
+    varios procesos y se insertan en la tabla en el proceso principal.
+    
     Args:
         chain_length: Longitud de cada cadena (t)
         num_entries: Número de entradas en la tabla (n)
         verbose: Si True, muestra el progreso
+        workers: Número de procesos (por defecto, uno por CPU)
     
     Returns:
-        Diccionario con estructura {hash_final: password_inicial}
+        Tupla (tabla, tiempo de construcción en segundos); la tabla es un
+        diccionario con estructura {hash_final: password_inicial}
     """
     start_time = time.time()  # Inicio del temporizador
 
     tabla = {}
     attempts = 0
     max_attempts = num_entries * 10  # Límite de intentos para evitar bucles infinitos
+    workers = workers or os.cpu_count() or 1
     
     if verbose:
         print(f"Construyendo tabla arcoíris...")
@@ -82,21 +114,27 @@ def build_rainbow_table(chain_length: int, num_entries: int, verbose: bool = Tru
         print(f"  - Espacio de claves: {SPACE_SIZE:,}")
         print(f"  - Cobertura aproximada: {(num_entries * chain_length / SPACE_SIZE * 100):.2f}%\n")
     
-    while len(tabla) < num_entries and attempts < max_attempts:
-        attempts += 1
-        
-        # Generar password inicial aleatorio
-        Pi = generate_random_password()
-        
-        # Construir la cadena
-        initial_psw, final_hash = build_chain(Pi, chain_length)
-        
-        # Almacenar en la tabla (solo si no existe ya ese hash final)
-        if final_hash not in tabla:
-            tabla[final_hash] = initial_psw
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while len(tabla) < num_entries and attempts < max_attempts:
+            # Generar passwords iniciales aleatorios por lotes (uno por entrada que falta)
+            initial_passwords = generate_random_passwords(
+                min(num_entries - len(tabla), max_attempts - attempts))
             
-            if verbose and len(tabla) % 1000 == 0:
-                print(f"  Progreso: {len(tabla):,}/{num_entries:,} entradas " + f"({len(tabla)/num_entries*100:.1f}%) - Intentos: {attempts:,}")
+            # Repartir el lote entre los procesos (varios trozos por proceso)
+            size = -(-len(initial_passwords) // (workers * 4))
+            batches = [initial_passwords[k:k + size] for k in range(0, len(initial_passwords), size)]
+            
+            # Construir las cadenas
+            for chains in executor.map(build_chains, batches, repeat(chain_length)):
+                for initial_psw, final_hash in chains:
+                    attempts += 1
+                    
+                    # Almacenar en la tabla (solo si no existe ya ese hash final)
+                    if final_hash not in tabla:
+                        tabla[final_hash] = initial_psw
+                        
+                        if verbose and len(tabla) % 1000 == 0:
+                            print(f"  Progreso: {len(tabla):,}/{num_entries:,} entradas " + f"({len(tabla)/num_entries*100:.1f}%) - Intentos: {attempts:,}")
     
     # Calcular tiempo total
     total_time = time.time() - start_time  # en segundos
@@ -108,12 +146,11 @@ def build_rainbow_table(chain_length: int, num_entries: int, verbose: bool = Tru
         print(f"  - Eficiencia: {len(tabla)/attempts*100:.2f}%")
     
     # Devolvemos también el tiempo total si se desea usar más adelante
-    tabla["_build_time"] = total_time  
-
-    return tabla
+    return tabla, total_time
 
 
-def save_rainbow_table(tabla: dict[bytes, str], chain_length: int, num_entries: int, folder: str = "tables") -> str:
+def save_rainbow_table(tabla: dict[bytes, str], chain_length: int, num_entries: int, folder: str = "tables",
+                       total_time: float | None = None) -> str:
     """
     Guarda la tabla arcoíris en un archivo CSV.
     
@@ -122,6 +159,7 @@ def save_rainbow_table(tabla: dict[bytes, str], chain_length: int, num_entries:
         chain_length: Longitud de cadena usada
         num_entries: Número de entradas objetivo
         folder: Carpeta donde guardar el archivo
+        total_time: Tiempo de construcción (s), si se quiere dejar en los metadatos
     
     Returns:
         Ruta del archivo guardado
@@ -134,8 +172,6 @@ def save_rainbow_table(tabla: dict[bytes, str], chain_length: int, num_entries:
     filename = f"rainbow_table_t{chain_length}_n{num_entries}_{timestamp}.csv"
     filepath = os.path.join(folder, filename)
     
-    total_time = tabla.pop("_build_time", None)  # Recuperar si existe
-
     # Guardar en CSV
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
@@ -162,8 +198,7 @@ def save_rainbow_table(tabla: dict[bytes, str], chain_length: int, num_entries:
         writer.writerow(['initial_password', 'final_hash_hex'])
         
         # Escribir datos
-        for final_hash, initial_psw in tabla.items():
-            writer.writerow([initial_psw, final_hash.hex()])
+        writer.writerows((initial_psw, final_hash.hex()) for final_hash, initial_psw in tabla.items())
     
     print(f"\n✓ Tabla guardada en: {filepath}")
     print(f"  - Tiempo de construcción: {total_time:.2f} s" if total_time else "")
@@ -171,14 +206,52 @@ def save_rainbow_table(tabla: dict[bytes, str], chain_length: int, num_entries:
     
     return filepath
 
+
+def save_rainbow_table_bin(tabla: dict[bytes, str], chain_length: int, num_entries: int, folder: str = "tables", filename: str | None = None) -> str:
+    """
+    Guarda la tabla arcoíris en formato binario (.bin): una cabecera con el
+    número de entradas, t y PSW_LEN, y después registros de 10 bytes (hash final +
+    password inicial) ordenados por hash final. Se carga sin parsear texto.
+    
+    Args:
+        tabla: Diccionario con la tabla arcoíris
+        chain_length: Longitud de cadena usada
+        num_entries: Número de entradas objetivo
+        folder: Carpeta donde guardar el archivo
+        filename: Nombre del archivo (por defecto se genera con timestamp)
+    
+    Returns:
+        Ruta del archivo guardado
+    """
+    os.makedirs(folder, exist_ok=True)
+    
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"rainbow_table_t{chain_length}_n{num_entries}_{timestamp}.bin"
+    filepath = os.path.join(folder, filename)
+    
+    entries = sorted(tabla.items())
+    
+    with open(filepath, 'wb') as binfile:
+        binfile.write(BIN_HEADER.pack(len(entries), chain_length, PSW_LEN))
+        binfile.write(b''.join(final_hash + initial_psw.encode() for final_hash, initial_psw in entries))
+    
+    print(f"\n✓ Tabla binaria guardada en: {filepath}")
+    print(f"  - Tamaño del archivo: {os.path.getsize(filepath) / 1024:.2f} KB")
+    
+    return filepath
+
 # --------------------- MAIN -------------------------
 
 if __name__ == "__main__":   
     # Construir la tabla
-    rainbow_table = build_rainbow_table(chain_length=t, num_entries=n)
+    rainbow_table, build_time = build_rainbow_table(chain_length=t, num_entries=n)
     
-    # Guardar la tabla en CSV
-    filepath = save_rainbow_table(rainbow_table, chain_length=t, num_entries=n)
+    # Guardar la tabla en CSV y en binario (más rápido de cargar)
+    filepath = save_rainbow_table(rainbow_table, chain_length=t, num_entries=n, total_time=build_time)
+    # Mismo nombre que el CSV para que ambos archivos se identifiquen como una tabla
+    bin_name = os.path.splitext(os.path.basename(filepath))[0] + ".bin"
+    save_rainbow_table_bin(rainbow_table, chain_length=t, num_entries=n, filename=bin_name)
     
     # Mostrar algunas entradas de ejemplo
     print("\n" + "="*60)
@@ -1,41 +1,73 @@
 import csv
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Tuple, Optional
 
 # Parámetros (deben coincidir con los de construcción)
 from config import (
     hash_function,
     reduction_function,
+    walk_chain,
     ALPHABET, PSW_LEN, HASH_LEN, TRUNC_LEN,
-    ALPHABET_SIZE, SPACE_SIZE
+    ALPHABET_SIZE, SPACE_SIZE, BIN_HEADER, BIN_RECORD_LEN
 )
 
 
+def load_rainbow_table_bin(filepath: str) -> Tuple[Dict[bytes, str], int]:
+    """
+    Carga una tabla arcoíris desde un archivo binario (.bin) escrito por
+    save_rainbow_table_bin: una sola lectura y sin parsear texto.
+    Lanza ValueError si el archivo está truncado o usa otro PSW_LEN.
+    
+    Returns:
+        Tupla (tabla, chain_length)
+    """
+    with open(filepath, 'rb') as binfile:
+        data = binfile.read()
+    
+    if len(data) < BIN_HEADER.size:
+        raise ValueError(f"Archivo binario demasiado corto: {filepath}")
+    num_entries, chain_length, psw_len = BIN_HEADER.unpack_from(data)
+    hash_len = HASH_LEN // 8
+    
+    # Comprobar que la tabla se construyó con los mismos parámetros y está completa
+    if psw_len != PSW_LEN:
+        raise ValueError(f"La tabla usa passwords de {psw_len} caracteres, se esperaban {PSW_LEN}")
+    expected_size = BIN_HEADER.size + num_entries * BIN_RECORD_LEN
+    if len(data) != expected_size:
+        raise ValueError(f"Tamaño de archivo incorrecto: {len(data)} bytes, se esperaban {expected_size}")
+    
+    # Cada registro: hash final (5 bytes) + password inicial (PSW_LEN bytes)
+    offsets = range(BIN_HEADER.size, BIN_HEADER.size + num_entries * BIN_RECORD_LEN, BIN_RECORD_LEN)
+    tabla = {data[k:k + hash_len]: data[k + hash_len:k + BIN_RECORD_LEN].decode() for k in offsets}
+    
+    print(f"✓ Tabla cargada: {len(tabla):,} entradas, t={chain_length}")
+    return tabla, chain_length
+
 def load_rainbow_table(filepath: str) -> Tuple[Dict[bytes, str], int]:
     """
-    Carga una tabla arcoíris desde un archivo CSV.
+    Carga una tabla arcoíris desde un archivo CSV (o binario si termina en .bin).
     
     Returns:
         Tupla (tabla, chain_length)
     """
+    if filepath.endswith('.bin'):
+        return load_rainbow_table_bin(filepath)
+    
     tabla = {}
     chain_length = 0
     
     with open(filepath, 'r', encoding='utf-8') as csvfile:
         reader = csv.reader(csvfile)
         
-        # Leer metadatos
+        # Leer metadatos hasta el encabezado de datos, en una sola pasada
         for row in reader:
             if not row:
-                break
+                continue
             if row[0] == '# Chain Length (t)':
                 chain_length = int(row[1])
-        
-        # Encontrar inicio de datos
-        csvfile.seek(0)
-        reader = csv.reader(csvfile)
-        for row in reader:
-            if row and row[0] == 'initial_password':
+            elif row[0] == 'initial_password':
                 break
         
         # Leer datos
@@ -56,7 +88,8 @@ def search_collision(p0: bytes, rainbow_table: Dict[bytes, str],
     en lugar del Algoritmo 2 simple (reducción constante).
     
     Fase 1: Proyecta p0 desde diferentes posiciones hasta el final
-    Fase 2: Reconstruye la cadena desde el inicio hasta encontrar p0
+    Fase 2: Reconstruye la cadena desde el inicio hasta la posición de la
+            coincidencia, donde debería estar el password buscado
     
     Args:
         p0: Hash del password original (resumen a atacar)
@@ -71,22 +104,27 @@ def search_collision(p0: bytes, rainbow_table: Dict[bytes, str],
         print(f"\nBuscando colisión para hash: {p0.hex()}")
     
     found_entry = None
+    # Alias locales para el bucle de la Fase 1 (se ejecuta t veces por búsqueda)
+    walk, lookup = walk_chain, rainbow_table.get
+    last_step = chain_length - 1
     
     # FASE 1: Proyección y búsqueda
     # Asumimos que p0 podría ser h(P_{i+1}) en cualquier posición i de la cadena
-    # y proyectamos hasta el final para ver si coincide con algún hash final en la tabla
-    for i in range(chain_length):
+    # y proyectamos hasta el final para ver si coincide con algún hash final en la tabla.
+    # Se recorre desde el final (i = t-1) hacia el inicio: la proyección desde i
+    # cuesta t-1-i pasos, así que las posiciones baratas se prueban primero y una
+    # búsqueda con éxito termina, de media, con la mitad de trabajo
+    for i in range(chain_length - 1, -1, -1):
         if verbose and i % 100 == 0:
             print(f"  Iteración {i}/{chain_length}...")
         
         # Proyectar desde la posición i hasta el final
-        p = p0
-        for j in range(i, chain_length - 1):
-            p = hash_function(reduction_function(p, iteration=j))
+        p = walk(p0, i, last_step)
         
-        # Verificar si este hash final está en la tabla
-        if p in rainbow_table:
-            found_entry = rainbow_table[p]
+        # Verificar si este hash final está en la tabla (una sola consulta:
+        # la mayoría de posiciones no coinciden y solo pagan este get)
+        found_entry = lookup(p)
+        if found_entry is not None:
             if verbose:
                 print(f"  ✓ Encontrado en iteración {i}")
                 print(f"    Password inicial de la cadena: '{found_entry}'")
@@ -97,30 +135,35 @@ def search_collision(p0: bytes, rainbow_table: Dict[bytes, str],
             if verbose:
                 print(f"\n  Reconstruyendo cadena desde '{pwd}'...")
             
-            # CORRECCIÓN CRÍTICA: Solo hacer t-1 reducciones (índices 0 a t-2)
-            # Una cadena de longitud t tiene t passwords pero solo t-1 reducciones
-            for step in range(chain_length - 1):
+            # La coincidencia en la iteración i supone p0 = h(P_i): el candidato
+            # está en la posición i, así que basta con i reducciones (0 a i-1)
+            # en lugar de recorrer las t-1 de la cadena. Si hubiera otra
+            # colisión más adelante, la proyección desde esa posición la encuentra
+            for step in range(i):
                 # Verificar si este password produce el hash buscado
-                if hash_function(pwd) == p0:
+                # (el mismo hash sirve después para avanzar la cadena)
+                h = hash_function(pwd)
+                if h == p0:
                     if verbose:
                         print(f"  ✓ ¡Colisión encontrada en el paso {step}!")
                         print(f"    Password: '{pwd}'")
-                        print(f"    Hash: {hash_function(pwd).hex()}")
+                        print(f"    Hash: {h.hex()}")
                     return pwd
                 
                 # Avanzar en la cadena: P_{step+1} -> P_{step+2}
                 if verbose and step % 100 == 0:
                     print(f"    Paso {step}: pwd='{pwd}'")
                 
-                pwd = reduction_function(hash_function(pwd), iteration=step)
+                pwd = reduction_function(h, iteration=step)
             
-            # Después del bucle (t-1 iteraciones): pwd contiene P_t
-            # Verificar el último elemento de la cadena (P_t)
-            if hash_function(pwd) == p0:
+            # Después del bucle (i iteraciones): pwd contiene P_i
+            # Verificar el elemento de la posición de la coincidencia (P_i)
+            h = hash_function(pwd)
+            if h == p0:
                 if verbose:
-                    print(f"  ✓ ¡Colisión encontrada al final de la cadena (P_t)!")
+                    print(f"  ✓ ¡Colisión encontrada en la posición {i} de la cadena!")
                     print(f"    Password: '{pwd}'")
-                    print(f"    Hash: {hash_function(pwd).hex()}")
+                    print(f"    Hash: {h.hex()}")
                 return pwd
             
             # Si no se encuentra, es una falsa alarma - continuar buscando
@@ -133,10 +176,35 @@ def search_collision(p0: bytes, rainbow_table: Dict[bytes, str],
     
     return None
 
-def test_search_random(rainbow_table: Dict[bytes, str], chain_length: int, num_tests: int = 10):
+# Estado de cada proceso de búsqueda: la tabla se envía una sola vez al
+# arrancar el proceso en lugar de con cada tarea
+_worker_table: Dict[bytes, str] = {}
+_worker_chain_length = 0
+
+def _init_search_worker(rainbow_table: Dict[bytes, str], chain_length: int):
+    global _worker_table, _worker_chain_length
+    _worker_table = rainbow_table
+    _worker_chain_length = chain_length
+
+def _timed_search(target_hash: bytes) -> Tuple[Optional[str], float]:
+    """
+    Ejecuta search_collision dentro de un proceso de búsqueda.
+    
+    Returns:
+        Tupla (password encontrado o None, tiempo de búsqueda en segundos)
+    """
+    start = time.time()
+    found_pwd = search_collision(target_hash, _worker_table, _worker_chain_length, verbose=False)
+    return found_pwd, time.time() - start
+
+def test_search_random(rainbow_table: Dict[bytes, str], chain_length: int, num_tests: int = 10,
+                       workers: Optional[int] = None):
     """
     Prueba el algoritmo de búsqueda con passwords COMPLETAMENTE aleatorios.
     Esta prueba simula un ataque real donde no sabemos si el password está en la tabla.
+    
+    Las búsquedas son independientes y se reparten entre varios procesos
+    (workers, por defecto uno por CPU); los resultados se muestran en orden.
     """
     import random
     
@@ -148,37 +216,39 @@ def test_search_random(rainbow_table: Dict[bytes, str], chain_length: int, num_t
     success_count = 0
     total_time = 0
     
-    for test_num in range(1, num_tests + 1):
-        # Generar password aleatorio
-        original_pwd = ''.join(random.choices(ALPHABET, k=PSW_LEN))
-        original_hash = hash_function(original_pwd)
-        
-        print(f"[Test {test_num}/{num_tests}] Password: '{original_pwd}' Hash: {original_hash.hex()}")
+    # Generar passwords aleatorios
+    original_pwds = [''.join(random.choices(ALPHABET, k=PSW_LEN)) for _ in range(num_tests)]
+    original_hashes = [hash_function(pwd) for pwd in original_pwds]
+    
+    # Buscar colisiones en paralelo
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                             initargs=(rainbow_table, chain_length)) as executor:
+        results = executor.map(_timed_search, original_hashes,
+                               chunksize=max(1, num_tests // (workers * 4)))
+        tests = zip(original_pwds, original_hashes, results)
         
-        # Buscar colisión
-        import time
-        start = time.time()
-        found_pwd = search_collision(original_hash, rainbow_table, chain_length, verbose=False)
-        elapsed = time.time() - start
-        total_time += elapsed
+        for test_num, (original_pwd, original_hash, (found_pwd, elapsed)) in enumerate(tests, 1):
+            print(f"[Test {test_num}/{num_tests}] Password: '{original_pwd}' Hash: {original_hash.hex()}")
+            total_time += elapsed
         
-        # Verificar resultado
-        if found_pwd:
-            found_hash = hash_function(found_pwd)
-            is_collision = (found_hash == original_hash)
+            # Verificar resultado
+            if found_pwd:
+                found_hash = hash_function(found_pwd)
+                is_collision = (found_hash == original_hash)
             
-            print(f"  ✓ Encontrado: '{found_pwd}' ({elapsed:.4f}s)", end="")
+                print(f"  ✓ Encontrado: '{found_pwd}' ({elapsed:.4f}s)", end="")
             
-            if is_collision:
-                if found_pwd == original_pwd:
-                    print(" [Idéntico]")
+                if is_collision:
+                    if found_pwd == original_pwd:
+                        print(" [Idéntico]")
+                    else:
+                        print(" [Alternativo]")
+                    success_count += 1
                 else:
-                    print(" [Alternativo]")
-                success_count += 1
+                    print(" [ERROR: hash no coincide]")
             else:
-                print(" [ERROR: hash no coincide]")
-        else:
-            print(f"  ✗ No encontrado ({elapsed:.4f}s)")
+                print(f"  ✗ No encontrado ({elapsed:.4f}s)")
     
     # Resumen
     print("\n" + "-"*70)
@@ -260,15 +330,22 @@ if __name__ == "__main__":
     
     # Listar archivos disponibles
     if os.path.exists(table_folder):
-        csv_files = [f for f in os.listdir(table_folder) if f.endswith('.csv')]
+        # Cada construcción guarda la misma tabla en .csv y en .bin: se lista
+        # una entrada por tabla, prefiriendo el .bin (más rápido de cargar)
+        table_files = {}
+        for f in sorted(os.listdir(table_folder)):
+            stem, ext = os.path.splitext(f)
+            if ext == '.bin' or (ext == '.csv' and stem not in table_files):
+                table_files[stem] = f
+        table_files = sorted(table_files.values())
         
-        if csv_files:
-            print("Archivos de tabla disponibles:")
-            for i, f in enumerate(csv_files, 1):
+        if table_files:
+            print("Tablas disponibles (se prefiere .bin si existe):")
+            for i, f in enumerate(table_files, 1):
                 print(f"  {i}. {f}")
             
             # Usar el archivo más reciente
-            latest_file = max([os.path.join(table_folder, f) for f in csv_files],
+            latest_file = max([os.path.join(table_folder, f) for f in table_files],
                             key=os.path.getmtime)
             print(f"\nUsando: {latest_file}\n")
             
@@ -295,7 +372,7 @@ if __name__ == "__main__":
             print("💡 La Prueba 1 debe dar ~100% (verifica que el código funciona)")
             print("💡 La Prueba 2 refleja la efectividad real del ataque")
         else:
-            print(f"No se encontraron archivos CSV en '{table_folder}'")
+            print(f"No se encontraron tablas (.csv ni .bin) en '{table_folder}'")
             print("Primero ejecuta el script de construcción de tabla.")
     else:
         print(f"La carpeta '{table_folder}' no existe.")